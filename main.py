@@ -1,19 +1,113 @@
-from fastapi import FastAPI, HTTPException, Form
+from fastapi import FastAPI, HTTPException, Form, Query, Request
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
-from huggingface_hub import InferenceClient
+from fastapi.responses import ORJSONResponse, Response
+from huggingface_hub import InferenceClient, configure_http_backend, constants
+from huggingface_hub.utils._http import OfflineAdapter, UniqueRequestIdAdapter
 import os
+import requests
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
-import base64
+import asyncio
+import hashlib
 import logging
-from datetime import datetime
+import re
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from functools import partial
+from typing import Optional
+
+# SIMD-accelerated base64 when available, stdlib otherwise
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+
+# Brotli response compression when available, gzip otherwise
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
 
 # Configure logging for better debugging
-logging.basicConfig(level=logging.INFO)
+# (records are timestamped by the formatter, only when actually emitted)
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
 logger = logging.getLogger(__name__)
 
 load_dotenv()
 
+# Largest request body accepted by /generate-video (a 200 character prompt
+# form is well under this, even fully percent-encoded)
+MAX_GENERATE_BODY_BYTES = 4 * 1024
+
+# Responses smaller than this are sent uncompressed
+COMPRESSION_MIN_SIZE = 1024
+# Cheap gzip level: the compressible responses are small JSON and HTML
+GZIP_COMPRESS_LEVEL = 3
+# Video responses (raw MP4 or base64 of it) barely compress, so skip them
+UNCOMPRESSED_PATHS = ("/videos/", "/generate-video")
+
+# Browser caching for the frontend page
+FRONTEND_CACHE_CONTROL = "public, max-age=300"
+
+# Video generation model and worker configuration
+MODEL_ID = "Wan-AI/Wan2.2-TI2V-5B"
+GENERATION_WORKERS = int(os.getenv("GENERATION_WORKERS", "8"))
+
+# Provider HTTP settings
+HTTP_CONNECT_RETRIES = 2      # Retries for connections that never reached the server
+# (connect, read) timeouts in seconds, so a hung provider call or video
+# download cannot hold a generation thread (and every request sharing it)
+# forever. The read timeout stays well above Replicate's 60 s "Prefer: wait"
+# window so answers arriving near that limit are not cut off.
+PROVIDER_TIMEOUT = (
+    float(os.getenv("PROVIDER_CONNECT_TIMEOUT", "5")),
+    float(os.getenv("PROVIDER_READ_TIMEOUT", "120")),
+)
+
+# Serverless instances do not share the in-process video cache, so a later
+# GET /videos/... may reach an instance without the video; embed it instead
+INLINE_VIDEOS_DEFAULT = bool(os.getenv("VERCEL")) or os.getenv("INLINE_VIDEOS", "").lower() in ("1", "true", "yes")
+
+# Generated video cache configuration
+VIDEO_CACHE_MAX_ENTRIES = 256
+VIDEO_CACHE_MAX_BYTES = 256 * 1024 * 1024   # 256 MB of MP4 data
+VIDEO_CACHE_TTL = 3600                      # Seconds before an entry expires
+
+# Bounded thread pool so blocking Replicate I/O never runs on the event loop.
+# Created on first use, so it also works where no lifespan runs (serverless)
+_generation_pool = None
+
+def get_generation_pool():
+    """
+    Return the generation thread pool, creating it on first use.
+    """
+    global _generation_pool
+    if _generation_pool is None:
+        _generation_pool = ThreadPoolExecutor(
+            max_workers=GENERATION_WORKERS,
+            thread_name_prefix="text-to-video",
+        )
+    return _generation_pool
+
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Shut down the generation thread pool, if one was started, on exit.
+    """
+    global _generation_pool
+    yield
+    if _generation_pool is not None:
+        _generation_pool.shutdown(wait=False, cancel_futures=True)
+        _generation_pool = None
+        logger.info("🛑 Generation thread pool stopped")
+
 app = FastAPI(
     title="Peppo AI Video Generator",
     description="AI-powered video generation with RAG-enhanced prompts - Assignment by Kakarla Dilleswara Rao",
@@ -21,9 +115,84 @@ app = FastAPI(
     contact={
         "name": "Kakarla Dilleswara Rao",
         "email": "dilleswar0050@gmail.com"
-    }
+    },
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
+class VideoAwareGZipMiddleware(GZipMiddleware):
+    """
+    GZip middleware that leaves video responses (MP4 or base64) untouched.
+    """
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(UNCOMPRESSED_PATHS):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+# Compress JSON and frontend responses, but never video payloads
+if BrotliMiddleware is not None:
+    app.add_middleware(
+        BrotliMiddleware,
+        quality=4,
+        minimum_size=COMPRESSION_MIN_SIZE,
+        gzip_fallback=True,
+        excluded_handlers=[f"^{path}" for path in UNCOMPRESSED_PATHS]
+    )
+else:
+    app.add_middleware(
+        VideoAwareGZipMiddleware,
+        minimum_size=COMPRESSION_MIN_SIZE,
+        compresslevel=GZIP_COMPRESS_LEVEL
+    )
+
+class GenerateBodyLimitMiddleware:
+    """
+    Reject oversized /generate-video bodies before the form is parsed.
+    
+    Pure ASGI so other routes (notably video responses) pass straight
+    through. A declared Content-Length over the limit is refused up front;
+    chunked bodies are counted as they arrive and cut off at the limit.
+    """
+    
+    def __init__(self, app, max_body_bytes):
+        self.app = app
+        self.max_body_bytes = max_body_bytes
+    
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"] != "/generate-video"
+        ):
+            await self.app(scope, receive, send)
+            return
+        
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > self.max_body_bytes:
+                logger.warning("⚠️ Rejected oversized request body: %s bytes", value.decode())
+                response = ORJSONResponse(status_code=413, content={"detail": "Request body too large"})
+                await response(scope, receive, send)
+                return
+        
+        received = 0
+        
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_bytes:
+                    logger.warning("⚠️ Rejected oversized streamed request body")
+                    # Raised inside the route, so FastAPI renders it as a 413
+                    raise HTTPException(status_code=413, detail="Request body too large")
+            return message
+        
+        await self.app(scope, limited_receive, send)
+
+app.add_middleware(GenerateBodyLimitMiddleware, max_body_bytes=MAX_GENERATE_BODY_BYTES)
+
 # Serve static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -33,84 +202,412 @@ if not HF_TOKEN:
     logger.error("⚠️ HF_TOKEN not found in environment variables")
     logger.info("Please set HF_TOKEN in your .env file or environment")
 
+class DefaultTimeoutAdapter(UniqueRequestIdAdapter):
+    """
+    Request-id adapter that applies PROVIDER_TIMEOUT when the caller sets none.
+    
+    InferenceClient's timeout only covers the generation POST; the follow-up
+    download of the provider's output URL is sent without one.
+    """
+    
+    def send(self, request, *args, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = PROVIDER_TIMEOUT
+        return super().send(request, *args, timeout=timeout, **kwargs)
+
+def build_http_session():
+    """
+    Create the HTTP session huggingface_hub uses for provider requests.
+    
+    Mirrors huggingface_hub's default backend (request ids, HF_HUB_OFFLINE
+    support), adding a default timeout and retries for connection failures
+    only, so a POST is never sent twice.
+    
+    Returns:
+        requests.Session: Session with retry and timeout defaults
+    """
+    session = requests.Session()
+    if constants.HF_HUB_OFFLINE:
+        adapter = OfflineAdapter()
+    else:
+        adapter = DefaultTimeoutAdapter(
+            max_retries=Retry(total=HTTP_CONNECT_RETRIES, read=0, status=0, backoff_factor=0.5),
+        )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+configure_http_backend(backend_factory=build_http_session)
+
 # Initialize InferenceClient with error handling
 try:
     client = InferenceClient(
         provider="replicate",
         api_key=HF_TOKEN,
+        timeout=PROVIDER_TIMEOUT,
     )
     logger.info("✅ InferenceClient initialized successfully")
 except Exception as e:
-    logger.error(f"❌ Failed to initialize InferenceClient: {e}")
+    client = None
+    logger.error("❌ Failed to initialize InferenceClient: %s", e)
 
-def enhance_prompt(user_prompt):
+# Cached video with its lazily computed base64 data URL (None until needed)
+CacheEntry = namedtuple("CacheEntry", "video_bytes data_url inserted_at")
+
+def _build_data_url(video_bytes):
+    return "data:video/mp4;base64," + base64.b64encode(video_bytes).decode('ascii')
+
+async def encode_data_url(video_bytes):
     """
-    Advanced RAG-style prompt enhancement for superior video quality.
+    Build a base64 MP4 data URL in a worker thread to keep the loop free.
     
-    This function analyzes the user's input and intelligently adds contextual
-    improvements based on content type detection and cinematic best practices.
+    Returns:
+        str: "data:video/mp4;base64,..." URL embedding the video
+    """
+    return await asyncio.to_thread(_build_data_url, video_bytes)
+
+class VideoCache:
+    """
+    In-process LRU cache of generated videos with TTL and a byte budget.
+    
+    Entries are evicted least-recently-used first whenever the entry count
+    or the total number of cached bytes exceeds its limit, and expire
+    VIDEO_CACHE_TTL seconds after insertion. The base64 data URL of a video
+    is only computed the first time an inline response needs it, then kept
+    alongside the raw bytes (and counted towards the byte budget).
+    """
+    
+    def __init__(self, max_entries, max_bytes, ttl):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()   # key -> CacheEntry
+        self._total_bytes = 0
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def make_key(enhanced_prompt, model=MODEL_ID):
+        """
+        Build a cache key so trivial prompt variants (case, spacing) collide.
+        
+        Args:
+            enhanced_prompt (str): Prompt sent to the model
+            model (str): Model identifier
+            
+        Returns:
+            str: Hex digest identifying the prompt/model pair
+        """
+        normalized = " ".join(enhanced_prompt.lower().split())
+        return hashlib.blake2b(f"{normalized}|{model}".encode(), digest_size=16).hexdigest()
+    
+    @staticmethod
+    def _entry_size(entry):
+        return len(entry.video_bytes) + (len(entry.data_url) if entry.data_url is not None else 0)
+    
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._total_bytes -= self._entry_size(entry)
+    
+    def _evict(self):
+        while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+    
+    async def get(self, key, record_stats=True):
+        """
+        Return cached video bytes for a key, or None on miss/expiry.
+        
+        Args:
+            key (str): Cache key from make_key()
+            record_stats (bool): Whether to count the lookup as a hit/miss
+        """
+        async with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry.inserted_at > self.ttl:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                if record_stats:
+                    self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if record_stats:
+                self.hits += 1
+            return entry.video_bytes
+    
+    async def set(self, key, video_bytes):
+        """
+        Store video bytes, evicting LRU entries to stay within limits.
+        
+        Returns:
+            bool: False if the video is too large to be cached
+        """
+        if len(video_bytes) > self.max_bytes:
+            return False
+        async with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = CacheEntry(video_bytes, None, time.monotonic())
+            self._total_bytes += len(video_bytes)
+            self._evict()
+        return True
+    
+    async def get_data_url(self, key, video_bytes):
+        """
+        Return the base64 data URL of a video, building it at most once.
+        
+        The encoding runs outside the lock and is only stored back if the
+        entry still holds the same video and the result fits the budget.
+        
+        Args:
+            key (str): Cache key from make_key()
+            video_bytes (bytes): Video data, used if the entry is not cached
+            
+        Returns:
+            str: "data:video/mp4;base64,..." URL embedding the video
+        """
+        async with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.data_url is not None:
+                return entry.data_url
+        
+        data_url = await encode_data_url(video_bytes)
+        
+        async with self._lock:
+            entry = self._entries.get(key)
+            if (
+                entry is not None
+                and entry.data_url is None
+                and entry.video_bytes is video_bytes
+                and len(video_bytes) + len(data_url) <= self.max_bytes
+            ):
+                self._entries[key] = entry._replace(data_url=data_url)
+                self._total_bytes += len(data_url)
+                self._entries.move_to_end(key)
+                self._evict()
+        return data_url
+    
+    def stats(self):
+        """
+        Return cache counters for monitoring.
+        """
+        return {
+            "entries": len(self._entries),
+            "bytes": self._total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+video_cache = VideoCache(VIDEO_CACHE_MAX_ENTRIES, VIDEO_CACHE_MAX_BYTES, VIDEO_CACHE_TTL)
+
+# Background tasks are tracked so they are not garbage collected mid-flight
+_background_tasks = set()
+
+# In-flight generations by cache key, shared by concurrent identical prompts
+_inflight = {}
+
+def spawn_background(coro):
+    """
+    Schedule a coroutine as a tracked background task.
+    """
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+async def run_generation(prompt):
+    """
+    Run one blocking text-to-video call on the generation thread pool.
     
     Args:
-        user_prompt (str): Original user input
+        prompt (str): Enhanced prompt to send to the model
         
     Returns:
-        str: Enhanced prompt with contextual improvements
+        bytes: Generated MP4 video data
     """
-    # Comprehensive knowledge base for different content categories
-    enhancement_database = {
-        "cinematic": "cinematic lighting, professional cinematography, high quality, smooth motion",
-        "nature": "beautiful natural scenery, natural lighting, peaceful atmosphere, HD quality",
-        "action": "dynamic movement, exciting motion, fast-paced action, high energy",
-        "portrait": "detailed facial features, realistic rendering, good lighting, clear focus",
-        "urban": "modern city atmosphere, urban environment, vibrant details, contemporary style",
-        "technical": "5 seconds duration, HD quality, smooth transitions, professional grade"
-    }
+    return await asyncio.get_running_loop().run_in_executor(
+        get_generation_pool(),
+        partial(client.text_to_video, prompt, model=MODEL_ID),
+    )
+
+async def generate_shared(cache_key, prompt):
+    """
+    Generate a video, joining an identical generation already in flight.
+    
+    The first request for a key starts the generation in a background task;
+    concurrent requests for the same key await that same result, so a burst
+    of duplicate prompts costs a single model call.
     
-    # Advanced keyword detection with multiple categories
-    enhanced = user_prompt.strip()
-    
-    # Content type analysis and enhancement
-    if any(keyword in user_prompt.lower() for keyword in ["person", "man", "woman", "people", "human", "character"]):
-        enhanced += f", {enhancement_database['portrait']}"
-        logger.info("📝 Applied portrait enhancements")
-    elif any(keyword in user_prompt.lower() for keyword in ["run", "jump", "fast", "action", "dance", "sport", "racing"]):
-        enhanced += f", {enhancement_database['action']}"
-        logger.info("📝 Applied action enhancements")
-    elif any(keyword in user_prompt.lower() for keyword in ["forest", "ocean", "mountain", "nature", "tree", "flower", "landscape"]):
-        enhanced += f", {enhancement_database['nature']}"
-        logger.info("📝 Applied nature enhancements")
-    elif any(keyword in user_prompt.lower() for keyword in ["city", "street", "building", "car", "urban", "downtown"]):
-        enhanced += f", {enhancement_database['urban']}"
-        logger.info("📝 Applied urban enhancements")
+    Args:
+        cache_key (str): Cache key for the prompt
+        prompt (str): Enhanced prompt to send to the model
+        
+    Returns:
+        tuple: (video_bytes, cached) where cached tells whether the video
+            was stored in the cache
+    """
+    fut = _inflight.get(cache_key)
+    if fut is None:
+        fut = asyncio.get_running_loop().create_future()
+        _inflight[cache_key] = fut
+        spawn_background(_run_and_set(fut, cache_key, prompt))
     else:
-        enhanced += f", {enhancement_database['cinematic']}"
-        logger.info("📝 Applied cinematic enhancements")
+        logger.debug("🔗 Joining in-flight generation for identical prompt")
     
-    # Add technical parameters for optimal generation
-    enhanced += f", {enhancement_database['technical']}"
+    # Shielded so one client disconnecting does not cancel it for the others
+    return await asyncio.shield(fut)
+
+async def _run_and_set(fut, cache_key, prompt):
+    """
+    Run a shared generation, cache its result and resolve its future.
+    """
+    try:
+        video_bytes = await run_generation(prompt)
+        
+        # Validate generation result
+        if not video_bytes:
+            raise Exception("Model returned empty response")
+        
+        cached = await video_cache.set(cache_key, video_bytes)
+        fut.set_result((video_bytes, cached))
+    except asyncio.CancelledError:
+        fut.cancel()
+        raise
+    except Exception as e:
+        fut.set_exception(e)
+        # Mark the error as retrieved in case every waiter has disconnected
+        fut.exception()
+    finally:
+        _inflight.pop(cache_key, None)
+
+# Comprehensive knowledge base for different content categories
+ENHANCEMENT_DATABASE = {
+    "cinematic": "cinematic lighting, professional cinematography, high quality, smooth motion",
+    "nature": "beautiful natural scenery, natural lighting, peaceful atmosphere, HD quality",
+    "action": "dynamic movement, exciting motion, fast-paced action, high energy",
+    "portrait": "detailed facial features, realistic rendering, good lighting, clear focus",
+    "urban": "modern city atmosphere, urban environment, vibrant details, contemporary style",
+    "technical": "5 seconds duration, HD quality, smooth transitions, professional grade"
+}
+
+# Final suffix per category (category details + technical parameters),
+# built once so enhancing a prompt is a single concatenation
+ENHANCEMENT_SUFFIXES = {
+    category: f", {details}, {ENHANCEMENT_DATABASE['technical']}"
+    for category, details in ENHANCEMENT_DATABASE.items()
+    if category != "technical"
+}
+
+# Content type keywords, checked in priority order. Prompts are matched on
+# whole words (so "manager" does not count as "man"), normalized by
+# word_forms() so inflections and compounds of a keyword still match.
+CATEGORY_KEYWORDS = (
+    ("portrait", ("person", "man", "woman", "people", "human", "character")),
+    ("action", ("run", "jump", "fast", "action", "dance", "sport", "racing")),
+    ("nature", ("forest", "ocean", "mountain", "nature", "tree", "flower", "landscape")),
+    ("urban", ("city", "street", "building", "car", "urban", "downtown")),
+)
+
+WORD_RE = re.compile(r"[a-z]+")
+WORD_SUFFIXES = ("ing", "ers", "est", "er", "ed", "es", "s")
+IRREGULAR_FORMS = {"ran": "run", "men": "man", "women": "woman"}
+MIN_STEM_LENGTH = 3
+
+def word_forms(word):
+    """
+    Return candidate base forms of a lowercase word.
     
-    logger.info(f"🚀 Prompt enhancement complete: '{user_prompt}' → Enhanced with {len(enhanced) - len(user_prompt)} additional characters")
-    return enhanced
+    Strips one common suffix, also trying the forms that suffix usually
+    hides: a dropped "e" (dancing -> dance), a doubled consonant
+    (running -> run) and "y" -> "i" (cities -> city).
+    
+    Args:
+        word (str): Lowercase word
+        
+    Returns:
+        set: The word itself plus its candidate base forms
+    """
+    forms = {word}
+    if word in IRREGULAR_FORMS:
+        forms.add(IRREGULAR_FORMS[word])
+    for suffix in WORD_SUFFIXES:
+        stem = word[:-len(suffix)]
+        if not word.endswith(suffix) or len(stem) < MIN_STEM_LENGTH:
+            continue
+        forms.add(stem)
+        forms.add(stem + "e")
+        if stem[-1] == stem[-2]:
+            forms.add(stem[:-1])
+        if stem.endswith("i"):
+            forms.add(stem[:-1] + "y")
+    return forms
+
+# Keyword base forms per category, normalized the same way as prompt words
+CATEGORY_FORMS = tuple(
+    (name, frozenset().union(*(word_forms(keyword) for keyword in keywords)), keywords)
+    for name, keywords in CATEGORY_KEYWORDS
+)
+
+def matches_category(forms, keyword_forms, keywords):
+    """
+    Check normalized prompt words against one category.
+    
+    Besides exact base-form matches, a compound ending in a keyword
+    (sunflower, racecar) matches when the part before it is a real word
+    (at least MIN_STEM_LENGTH letters), which keeps "scar" from matching "car".
+    """
+    if not forms.isdisjoint(keyword_forms):
+        return True
+    return any(
+        form.endswith(keyword) and len(form) - len(keyword) >= MIN_STEM_LENGTH
+        for form in forms
+        for keyword in keywords
+    )
 
-@app.get("/", response_class=HTMLResponse)
-async def read_root():
+def enhance_prompt(user_prompt):
     """
-    Serve the main application interface.
+    Advanced RAG-style prompt enhancement for superior video quality.
+    
+    This function analyzes the user's input and intelligently adds contextual
+    improvements based on content type detection and cinematic best practices.
     
+    Args:
+        user_prompt (str): Original user input, already stripped of
+            surrounding whitespace by the caller
+        
     Returns:
-        HTMLResponse: Main application page with full functionality
+        str: Enhanced prompt with contextual improvements
     """
-    try:
-        with open("static/index.html", "r", encoding="utf-8") as f:
-            content = f.read()
-        logger.info("📄 Main page served successfully")
-        return HTMLResponse(content=content)
-    except FileNotFoundError:
-        logger.error("❌ index.html not found in static directory")
-        raise HTTPException(status_code=404, detail="Application frontend not found")
+    # Content type analysis with multiple categories
+    forms = set()
+    for word in set(WORD_RE.findall(user_prompt.lower())):
+        forms |= word_forms(word)
+    category = next(
+        (
+            name for name, keyword_forms, keywords in CATEGORY_FORMS
+            if matches_category(forms, keyword_forms, keywords)
+        ),
+        "cinematic"
+    )
+    logger.debug("📝 Applied %s enhancements", category)
+    
+    # Category enhancements plus technical parameters for optimal generation
+    enhanced = user_prompt + ENHANCEMENT_SUFFIXES[category]
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "🚀 Prompt enhancement complete: %r → Enhanced with %d additional characters",
+            user_prompt, len(enhanced) - len(user_prompt)
+        )
+    return enhanced
 
 @app.post("/generate-video")
-async def generate_video(prompt: str = Form(...)):
+async def generate_video(prompt: str = Form(...), inline: Optional[bool] = Query(None)):
     """
     Generate AI video from text prompt with advanced RAG enhancement.
     
@@ -119,9 +616,11 @@ async def generate_video(prompt: str = Form(...)):
     
     Args:
         prompt (str): User's text description for video generation
+        inline (bool): Also embed the video as a base64 data URL
+            (defaults to INLINE_VIDEOS_DEFAULT)
         
     Returns:
-        dict: Generated video data with enhancement details
+        dict: Video URL (and optional inline data) with enhancement details
         
     Raises:
         HTTPException: If generation fails or token is invalid
@@ -131,61 +630,74 @@ async def generate_video(prompt: str = Form(...)):
         logger.error("🔒 Generation attempted without valid API token")
         raise HTTPException(status_code=500, detail="API token not configured - please contact administrator")
     
-    # Input validation and sanitization
-    if not prompt or len(prompt.strip()) < 3:
-        logger.warning(f"⚠️ Invalid prompt received: '{prompt}'")
+    if client is None:
+        logger.error("🔒 Generation attempted without an initialized InferenceClient")
+        raise HTTPException(status_code=503, detail="Video generation service unavailable - please try again later")
+    
+    # Input sanitization and validation on the normalized prompt
+    original_prompt = prompt.strip()
+    prompt_length = len(original_prompt)
+    if prompt_length < 3:
+        logger.warning("⚠️ Invalid prompt received: %r", prompt)
         raise HTTPException(status_code=400, detail="Prompt must be at least 3 characters long")
     
-    if len(prompt) > 200:
-        logger.warning(f"⚠️ Prompt too long: {len(prompt)} characters")
+    if prompt_length > 200:
+        logger.warning("⚠️ Prompt too long: %d characters", prompt_length)
         raise HTTPException(status_code=400, detail="Prompt must be less than 200 characters")
     
     try:
         # RAG-enhanced prompt processing
-        original_prompt = prompt.strip()
         enhanced_prompt = enhance_prompt(original_prompt)
         
         # Log generation attempt
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        logger.info(f"🎬 Video generation started at {timestamp}")
-        logger.info(f"📝 Original prompt: '{original_prompt}'")
-        logger.info(f"🚀 Enhanced prompt: '{enhanced_prompt}'")
-        
-        # Generate video using verified AI model
-        logger.info("🤖 Calling Wan-AI/Wan2.2-TI2V-5B model via Replicate...")
-        video_bytes = client.text_to_video(
-            enhanced_prompt,
-            model="Wan-AI/Wan2.2-TI2V-5B",
-        )
-        
-        # Validate generation result
-        if not video_bytes:
-            raise Exception("Model returned empty response")
+        logger.debug("🎬 Video generation started")
+        logger.debug("📝 Original prompt: %r", original_prompt)
+        logger.debug("🚀 Enhanced prompt: %r", enhanced_prompt)
         
-        video_size_mb = len(video_bytes) / (1024 * 1024)
-        logger.info(f"✅ Video generated successfully: {len(video_bytes):,} bytes ({video_size_mb:.2f} MB)")
+        # Serve repeat prompts from the cache before calling the model
+        cache_key = video_cache.make_key(enhanced_prompt)
+        video_bytes = await video_cache.get(cache_key)
+        cached = video_bytes is not None
+        if cached:
+            logger.debug("⚡ Cache hit - reusing previously generated video")
+        else:
+            # Generate video using verified AI model
+            logger.debug("🤖 Calling %s model via Replicate...", MODEL_ID)
+            video_bytes, cached = await generate_shared(cache_key, enhanced_prompt)
         
-        # Secure base64 encoding for frontend transfer
-        video_base64 = base64.b64encode(video_bytes).decode('utf-8')
+        logger.debug(
+            "✅ Video generated successfully: %d bytes (%.2f MB)",
+            len(video_bytes), len(video_bytes) / (1024 * 1024)
+        )
         
         # Comprehensive response with metadata
         response_data = {
             "status": "success",
-            "video_data": f"data:video/mp4;base64,{video_base64}",
+            "video_url": f"/videos/{cache_key}" if cached else None,
             "enhanced_prompt": enhanced_prompt,
             "original_prompt": original_prompt,
-            "model_used": "Wan-AI/Wan2.2-TI2V-5B",
-            "generation_timestamp": timestamp,
+            "model_used": MODEL_ID,
+            "generation_timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
             "video_size_bytes": len(video_bytes),
             "enhancement_applied": True
         }
         
-        logger.info("🎉 Video generation completed successfully")
+        # Base64 payload only for clients that ask for it, or when the video
+        # was too large to keep in the cache for streaming
+        if inline is None:
+            inline = INLINE_VIDEOS_DEFAULT
+        if inline or not cached:
+            if cached:
+                response_data["video_data"] = await video_cache.get_data_url(cache_key, video_bytes)
+            else:
+                response_data["video_data"] = await encode_data_url(video_bytes)
+        
+        logger.debug("🎉 Video generation completed successfully")
         return response_data
         
     except Exception as e:
         error_message = str(e)
-        logger.error(f"❌ Video generation failed: {error_message}")
+        logger.error("❌ Video generation failed: %s", error_message)
         
         # Detailed error logging for debugging
         if "rate limit" in error_message.lower():
@@ -200,6 +712,120 @@ async def generate_video(prompt: str = Form(...)):
             detail=f"Video generation failed: {error_message}"
         )
 
+def parse_byte_range(range_header, size):
+    """
+    Parse a single "bytes=start-end" (or "bytes=-suffix") Range header.
+    
+    Args:
+        range_header (str): Value of the Range request header
+        size (int): Total size of the resource
+        
+    Returns:
+        tuple: (start, end) inclusive offsets, or None if unsatisfiable
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    start, _, end = spec.strip().partition("-")
+    try:
+        if not start:
+            # Suffix range: the last N bytes
+            length = int(end)
+            if length <= 0:
+                return None
+            return max(size - length, 0), size - 1
+        start = int(start)
+        end = int(end) if end else size - 1
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        return None
+    return start, min(end, size - 1)
+
+@app.api_route("/videos/{video_id}", methods=["GET", "HEAD"])
+async def stream_video(video_id: str, request: Request):
+    """
+    Serve a previously generated video as raw MP4 bytes.
+    
+    Supports HEAD and single byte-range requests, which Safari/iOS video
+    playback relies on.
+    
+    Args:
+        video_id (str): Identifier returned as part of video_url
+        
+    Returns:
+        Response: Full (200) or partial (206) MP4 content
+        
+    Raises:
+        HTTPException: If the video is unknown or has expired
+    """
+    video_bytes = await video_cache.get(video_id, record_stats=False)
+    if video_bytes is None:
+        raise HTTPException(status_code=404, detail="Video not found or expired")
+    
+    size = len(video_bytes)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Cache-Control": f"private, max-age={VIDEO_CACHE_TTL}"
+    }
+    status_code = 200
+    start, end = 0, size - 1
+    
+    # Multi-range and non-byte ranges are ignored and get the full body
+    range_header = request.headers.get("range")
+    if range_header and range_header.startswith("bytes=") and "," not in range_header:
+        byte_range = parse_byte_range(range_header, size)
+        if byte_range is None:
+            headers["Content-Range"] = f"bytes */{size}"
+            return Response(status_code=416, headers=headers)
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    
+    headers["Content-Length"] = str(end - start + 1)
+    if request.method == "HEAD":
+        return Response(status_code=status_code, headers=headers, media_type="video/mp4")
+    
+    body = video_bytes if status_code == 200 else video_bytes[start:end + 1]
+    return Response(content=body, status_code=status_code, headers=headers, media_type="video/mp4")
+
+# Static portions of the monitoring endpoints, built once at import time
+_HEALTH_STATIC = {
+    "status": "healthy",
+    "service": "Peppo AI Video Generator",
+    "version": "1.0.0",
+    "developer": "Kakarla Dilleswara Rao",
+    "contact": "dilleswar0050@gmail.com",
+    "api_configured": bool(HF_TOKEN),
+    "features": ["Text-to-Video", "RAG Enhancement", "Download Support"]
+}
+
+_API_INFO = {
+    "api_name": "Peppo AI Video Generator",
+    "version": "1.0.0",
+    "developer": {
+        "name": "Kakarla Dilleswara Rao",
+        "email": "dilleswar0050@gmail.com",
+        "phone": "9150478989"
+    },
+    "features": {
+        "text_to_video": "Generate videos from text descriptions",
+        "rag_enhancement": "Intelligent prompt improvement using RAG techniques",
+        "download_support": "Direct video download functionality",
+        "real_time_processing": "Live generation status updates"
+    },
+    "model_details": {
+        "primary_model": MODEL_ID,
+        "provider": "Replicate via Hugging Face",
+        "capabilities": "High-quality text-to-video generation"
+    },
+    "technical_specs": {
+        "framework": "FastAPI",
+        "deployment": "Vercel Serverless",
+        "security": "Environment-based API key management"
+    }
+}
+
 @app.get("/health")
 async def health_check():
     """
@@ -209,14 +835,9 @@ async def health_check():
         dict: System status and configuration details
     """
     health_status = {
-        "status": "healthy",
-        "service": "Peppo AI Video Generator",
-        "version": "1.0.0",
-        "developer": "Kakarla Dilleswara Rao",
-        "contact": "dilleswar0050@gmail.com",
-        "timestamp": datetime.now().isoformat(),
-        "api_configured": bool(HF_TOKEN),
-        "features": ["Text-to-Video", "RAG Enhancement", "Download Support"]
+        **_HEALTH_STATIC,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "video_cache": video_cache.stats()
     }
     logger.info("💚 Health check performed")
     return health_status
@@ -229,34 +850,41 @@ async def api_information():
     Returns:
         dict: Comprehensive API details and capabilities
     """
-    return {
-        "api_name": "Peppo AI Video Generator",
-        "version": "1.0.0",
-        "developer": {
-            "name": "Kakarla Dilleswara Rao",
-            "email": "dilleswar0050@gmail.com",
-            "phone": "9150478989"
-        },
-        "features": {
-            "text_to_video": "Generate videos from text descriptions",
-            "rag_enhancement": "Intelligent prompt improvement using RAG techniques",
-            "download_support": "Direct video download functionality",
-            "real_time_processing": "Live generation status updates"
-        },
-        "model_details": {
-            "primary_model": "Wan-AI/Wan2.2-TI2V-5B",
-            "provider": "Replicate via Hugging Face",
-            "capabilities": "High-quality text-to-video generation"
-        },
-        "technical_specs": {
-            "framework": "FastAPI",
-            "deployment": "Vercel Serverless",
-            "security": "Environment-based API key management"
-        }
-    }
+    return _API_INFO
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles that lets browsers reuse the frontend for a few minutes.
+    
+    ETag/Last-Modified revalidation is handled by StaticFiles itself.
+    """
+    
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = FRONTEND_CACHE_CONTROL
+        return response
+
+# Serve the frontend (index.html at "/"). Mounted last so the API routes
+# above take precedence over the catch-all static mount.
+app.mount("/", CachedStaticFiles(directory="static", html=True), name="root")
 
 if __name__ == "__main__":
     import uvicorn
     logger.info("🚀 Starting Peppo AI Video Generator...")
     logger.info("👨‍💻 Developed by Kakarla Dilleswara Rao")
-    uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
+    # The video cache lives in each worker process, so /videos/ URLs are
+    # only guaranteed to resolve with a single worker. Raise WEB_CONCURRENCY
+    # when clients use ?inline=1 or behind sticky sessions.
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    uvicorn.run(
+        # Multiple workers need an import string; a single worker reuses this
+        # module instead of importing (and initializing) it a second time
+        "main:app" if workers > 1 else app,
+        host="127.0.0.1",
+        port=8000,
+        # "auto" picks uvloop/httptools whenever they are installed
+        loop="auto",
+        http="auto",
+        workers=workers,
+        log_level="info"
+    )
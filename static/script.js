@@ -60,6 +60,20 @@ function startProgressAnimation() {
     return interval;
 }
 
+// The video URL is served from one server instance's memory; if it cannot
+// be loaded (another instance, or evicted), ask the user to try again
+function showVideoUnavailable() {
+    document.getElementById('result').style.display = 'none';
+    const error = document.getElementById('error');
+    error.style.display = 'block';
+    error.innerHTML = `
+        <h4>⚠️ Video Unavailable</h4>
+        <p>The generated video could not be loaded from the server.</p>
+        <small>Please click Generate Video to try again.</small>
+    `;
+    showNotification('Video could not be loaded. Please try again.');
+}
+
 // Enhanced form submission with better UX
 document.getElementById('videoForm').addEventListener('submit', async function(e) {
     e.preventDefault();
@@ -112,7 +126,8 @@ document.getElementById('videoForm').addEventListener('submit', async function(e
             
             setTimeout(() => {
                 const video = document.getElementById('generatedVideo');
-                video.src = data.video_data;
+                video.onerror = data.video_data ? null : showVideoUnavailable;
+                video.src = data.video_data || data.video_url;
                 
                 // Enhanced prompt display
                 document.getElementById('enhancedPrompt').innerHTML = `